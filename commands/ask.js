@@ -33,7 +33,9 @@ client.on("messageCreate", async (message) => {
 
             const history = getConversationHistory(userId);
             const historyString = history.map(h => `${h.role}: ${h.content}`).join('\n');
-            const python = spawn("python", ["-u", "scripts/ask.py", question]);
+            const python = spawn("python", ["-u", "scripts/ask.py", question], {
+                env: { ...process.env, TRANSMEET_CONVERSATION_ID: userId }
+            });
 
             python.stdin.write(historyString);
             python.stdin.end();
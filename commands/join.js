@@ -14,7 +14,7 @@ const CHANNEL_ID_TO_SEND_ATA = config.CHANNEL_ID_TO_SEND_ATA;
 let decoder;
 let connection = null;
 let userStreams = new Map();
-let outStream, logStream, bufferStream, filename, logFilename, pcmDir, logDir;
+let outStream, logStream, bufferStream, filename, logFilename, pcmDir, logDir, meetingId;
 
 client.on("messageCreate", async (message) => {
   if (message.content === "!join".toLowerCase().trim() && message.author.id !== client.user.id) {
@@ -26,6 +26,7 @@ client.on("messageCreate", async (message) => {
     console.log("🎤 Conectado ao canal de voz!");
 
     const timestamp = Date.now();
+    meetingId = String(timestamp);
     pcmDir = path.join(__dirname, "..", "files", "pcmAudios");
     logDir = path.join(__dirname, "..", "files", "logs")
     if (!fs.existsSync(pcmDir)) fs.mkdirSync(pcmDir, { recursive: true });
@@ -101,7 +102,7 @@ client.on("messageCreate", async (message) => {
                 console.log("✅ Transcrição concluída!");
             
             console.log("🔄 Associando transcrição com logs...");
-            const associateProcess = spawnSync("python", ["./scripts/associate.py"], {
+            const associateProcess = spawnSync("python", ["./scripts/associate.py", meetingId], {
                 stdio: "inherit",
             });
             
@@ -111,7 +112,7 @@ client.on("messageCreate", async (message) => {
                 console.log("✅ Transcrição associada!");
                 
                 console.log("🧠 Gerando ATA...");
-                const generateProcess = spawnSync("python", ["./scripts/generate_ata.py"], {
+                const generateProcess = spawnSync("python", ["./scripts/generate_ata.py", meetingId], {
                     stdio: "inherit",
                 });
 
@@ -121,21 +122,13 @@ client.on("messageCreate", async (message) => {
                     console.log("✅ ATA gerada com sucesso!");
 
                 (async () => {
-                    const ataDir = path.join(__dirname, "..", "files", "ata");
-                    if (!fs.existsSync(ataDir)) {
-                        console.error("❌ Diretório de atas não encontrado!");
+                    const ataPath = path.join(__dirname, "..", "files", "ata", `ata_reuniao_${meetingId}.txt`);
+                    if (!fs.existsSync(ataPath)) {
+                        console.error(`❌ Arquivo de ata não encontrado: ${ataPath}`);
                         return;
                     }
-                    
-                    const ataFiles = fs.readdirSync(ataDir).filter(file => file.endsWith(".txt"));
-                
-                    if (!ataFiles.length) {
-                        console.error("❌ Nenhum arquivo de ata encontrado!");
-                        return;
-                    }
-                
-                    const latestAta = ataFiles.sort().reverse()[0];
-                    const ataContent = fs.readFileSync(path.join(ataDir, latestAta), "utf-8");
+
+                    const ataContent = fs.readFileSync(ataPath, "utf-8");
                 
                     try {
                     const targetChannel = await client.channels.fetch(CHANNEL_ID_TO_SEND_ATA);
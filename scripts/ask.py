@@ -6,10 +6,13 @@ from openai import OpenAI
 from google import genai
 from google.genai import types
 from dotenv import load_dotenv
-from qdrant_client import QdrantClient
+from qdrant_client import QdrantClient, models
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import *
+from history import prepare_history
+from mmr import mmr_select, MMR_LAMBDA, MMR_OVERFETCH_FACTOR
+from dedup import SIGNATURE_FIELDS
 
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
@@ -19,6 +22,7 @@ QDRANT_HOST = "localhost"
 QDRANT_PORT = 6333
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+RAG_CONTEXT_LIMIT = 5
 
 try:
     if not OPENAI_API_KEY:
@@ -42,7 +46,7 @@ def get_repo_configs():
         with open(config_path, 'r', encoding='utf-8') as f:
             return json.load(f).get('repositories', [])
     except (FileNotFoundError, json.JSONDecodeError) as e:
-        send_event(f"ERRO: Não foi possível carregar ou decodificar o repos.json: {e}", {e})
+        send_event("ERROR", f"Não foi possível carregar ou decodificar o repos.json: {e}")
         return []
 
 def route_question(question, repo_configs):
@@ -80,7 +84,7 @@ def route_question(question, repo_configs):
         return choice
 
     except Exception as e:
-        send_event(f"ERRO: Falha ao rotear a pergunta com o LLM: {e}")
+        send_event("ERROR", f"Falha ao rotear a pergunta com o LLM: {e}")
         return None
 
 def get_embedding(text):
@@ -88,21 +92,32 @@ def get_embedding(text):
         response = client.embeddings.create(input=[text], model=EMBEDDING_MODEL)
         return response.data[0].embedding
     except Exception as e:
-        send_event(f"ERRO: Falha ao gerar embedding: {e}")
+        send_event("ERROR", f"Falha ao gerar embedding: {e}")
         sys.exit(1)
 
-def search_qdrant(collection_name, query_embedding, limit=7):
+def search_qdrant(collection_name, query_embedding, limit=RAG_CONTEXT_LIMIT):
+    fetch_limit = limit * MMR_OVERFETCH_FACTOR
     try:
-        return qdrant_client.search(
+        candidates = qdrant_client.search(
             collection_name=collection_name,
             query_vector=query_embedding,
-            limit=limit,
-            with_payload=True
+            limit=fetch_limit,
+            with_payload=models.PayloadSelectorExclude(exclude=SIGNATURE_FIELDS),
+            with_vectors=True
         )
     except Exception as e:
-        send_event(f"AVISO: Não foi possível buscar na coleção '{collection_name}'. Ela pode não existir. Erro: {e}")
+        send_event("AVISO", f"Não foi possível buscar na coleção '{collection_name}'. Ela pode não existir. Erro: {e}")
         return []
 
+    results = mmr_select(query_embedding, candidates, limit)
+    print(
+        f"INFO: MMR (lambda={MMR_LAMBDA}): {len(results)} selecionados, "
+        f"{len(candidates) - len(results)} descartados de {len(candidates)} candidatos "
+        f"(overfetch de {fetch_limit} para {limit}).",
+        file=sys.stderr
+    )
+    return results
+
 def format_context(search_results):
     if not search_results:
         return "Nenhum contexto relevante encontrado na base de conhecimento."
@@ -129,20 +144,23 @@ def main():
         sys.exit(1)
     question = " ".join(sys.argv[1:]).strip()
     conversation_history = sys.stdin.read().strip()
+    conversation_id = os.getenv("TRANSMEET_CONVERSATION_ID")
 
     print(f"Pergunta: {question}\n", file=sys.stderr)
+    search_query = question
     if conversation_history:
-        print(f"INFO: Histórico da conversa recebido:\n---\n{conversation_history}\n---", file=sys.stderr)
+        conversation_history, search_query = prepare_history(conversation_history, question, conversation_id)
+        print(f"INFO: Histórico da conversa compactado:\n---\n{conversation_history}\n---", file=sys.stderr)
+        print(f"INFO: Consulta de busca reescrita: {search_query}", file=sys.stderr)
 
     repo_configs = get_repo_configs()
     if not repo_configs:
         print("AVISO: Nenhum repositório configurado em repos.json.", file=sys.stderr)
 
     print("INFO: Camada 1: Roteando a pergunta para a base de conhecimento apropriada...", file=sys.stderr)
-    chosen_collection = route_question(question, repo_configs)
+    chosen_collection = route_question(search_query, repo_configs)
 
     search_results = []
-    question_embedding = get_embedding(question)
 
     # if chosen_collection and chosen_collection != 'none':
     #     print(f"INFO: Roteador selecionou a coleção: '{chosen_collection}'", file=sys.stderr)
@@ -166,7 +184,7 @@ def main():
     if chosen_collection and chosen_collection != 'geral':
         print(f"INFO: Roteador selecionou a coleção: '{chosen_collection}'", file=sys.stderr)
         print("INFO: Buscando por contexto relevante...", file=sys.stderr)
-        question_embedding = get_embedding(question)
+        question_embedding = get_embedding(search_query)
         search_results = search_qdrant(chosen_collection, question_embedding)
         rag_context_string = format_context(search_results)
     else:
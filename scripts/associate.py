@@ -1,27 +1,25 @@
 import os
 import json
-import time
+import sys
+import catalog
 from datetime import datetime
 from collections import defaultdict
 
-base_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
-logs_dir = os.path.join(base_dir, "files", "logs")
-json_dir = os.path.join(base_dir, "files", "json")
-
-json_files = sorted([f for f in os.listdir(json_dir) if f.startswith("transcription_") and f.endswith(".json")], reverse=True)
-if not json_files:
-    print("❌ Nenhum arquivo de transcrição encontrado!")
+conn = catalog.connect()
+meeting = catalog.resolve_meeting(conn, "associate", sys.argv)
+if not meeting or not meeting["transcription_path"]:
+    print("❌ Nenhuma transcrição pendente de associação no catálogo!")
     exit(1)
-json_path = os.path.join(json_dir, json_files[0])
+meeting_id = meeting["meeting_id"]
+json_path = meeting["transcription_path"]
 with open(json_path, "r", encoding="utf-8") as f:
     transcription = json.load(f)
-print(f"📄 Usando transcrição: {json_files[0]}")
+print(f"📄 Usando transcrição: {os.path.basename(json_path)}")
 
-log_files = sorted([f for f in os.listdir(logs_dir) if f.startswith("log_") and f.endswith(".txt")], reverse=True)
-if not log_files:
-    print("❌ Nenhum arquivo de log encontrado!")
+log_path = meeting["log_path"]
+if not log_path or not os.path.exists(log_path):
+    print(f"❌ Nenhum arquivo de log registrado para a reunião {meeting_id}!")
     exit(1)
-log_path = os.path.join(logs_dir, log_files[0])
 with open(log_path, "r", encoding="utf-8") as f:
     log_lines = f.readlines()
 
@@ -55,10 +53,9 @@ for event in speaker_windows:
             "end": event["time"]
         })
 
-output_dir = os.path.join(base_dir, "files", "outputs")
+output_dir = os.path.join(catalog.files_dir, "outputs")
 os.makedirs(output_dir, exist_ok=True)
-timestamp = int(time.time())
-output_path = os.path.join(output_dir, f"output_{timestamp}.txt")
+output_path = os.path.join(output_dir, f"output_{meeting_id}.txt")
 
 try:
     with open(output_path, "w", encoding="utf-8") as f:
@@ -80,8 +77,10 @@ try:
 
             f.write(f"{speaker}: {text.strip()}\n")
 
+    catalog.mark_stage(conn, meeting_id, "associate", association_path=os.path.abspath(output_path))
     print(f"✅ Texto associado salvo em: {output_path}")
 except Exception as e:
     print(f"❌ Erro ao salvar o arquivo de associação: {str(e)}")
+    catalog.mark_stage(conn, meeting_id, "associate", status="failed")
     import traceback
     traceback.print_exc()
\ No newline at end of file
@@ -0,0 +1,260 @@
+import os
+import re
+import sys
+import sqlite3
+import hashlib
+from datetime import datetime
+
+base_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+files_dir = os.path.join(base_dir, "files")
+CATALOG_PATH = os.path.join(files_dir, "catalog.db")
+
+QDRANT_HOST = "localhost"
+QDRANT_PORT = 6333
+MEETINGS_COLLECTION = "transmeet_meetings_local"
+
+PCM_SAMPLE_RATE = 48000
+PCM_CHANNELS = 2
+PCM_SAMPLE_WIDTH = 2
+
+# Cada etapa depende da anterior: convert -> transcribe -> associate -> ata / index.
+STAGES = ("convert", "transcribe", "associate", "ata", "index")
+STAGE_REQUIRES = {
+    "convert": None,
+    "transcribe": "convert",
+    "associate": "transcribe",
+    "ata": "associate",
+    "index": "transcribe",
+}
+
+ARTIFACT_COLUMNS = (
+    "pcm_path", "pcm_hash", "log_path", "m4a_path", "m4a_hash", "duration_seconds",
+    "transcription_path", "transcription_hash", "association_path", "ata_path",
+)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS meetings (
+    meeting_id TEXT PRIMARY KEY,
+    pcm_path TEXT,
+    pcm_hash TEXT,
+    log_path TEXT,
+    m4a_path TEXT,
+    m4a_hash TEXT,
+    duration_seconds REAL,
+    transcription_path TEXT,
+    transcription_hash TEXT,
+    association_path TEXT,
+    ata_path TEXT,
+    {", ".join(f"{stage}_status TEXT NOT NULL DEFAULT 'pending'" for stage in STAGES)},
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+{"".join(f"CREATE INDEX IF NOT EXISTS idx_meetings_{stage} ON meetings ({stage}_status);" for stage in STAGES)}
+"""
+
+MEETING_ID_RE = re.compile(r"_(\d+)\.\w+$")
+
+def connect(path=CATALOG_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def now():
+    return datetime.now().isoformat(timespec="seconds")
+
+def file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def pcm_duration(path):
+    return os.path.getsize(path) / (PCM_SAMPLE_RATE * PCM_CHANNELS * PCM_SAMPLE_WIDTH)
+
+def meeting_id_from_path(path):
+    """Extrai o id da reunião de nomes como audio_<id>.pcm, audio_<id>.m4a ou log_<id>.txt."""
+    match = MEETING_ID_RE.search(os.path.basename(path))
+    return match.group(1) if match else None
+
+def register_meeting(conn, meeting_id, **artifacts):
+    timestamp = now()
+    with conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO meetings (meeting_id, created_at, updated_at) VALUES (?, ?, ?)",
+            (meeting_id, timestamp, timestamp)
+        )
+    if artifacts:
+        update_meeting(conn, meeting_id, **artifacts)
+
+def update_meeting(conn, meeting_id, **fields):
+    invalid = set(fields) - set(ARTIFACT_COLUMNS) - {f"{stage}_status" for stage in STAGES}
+    if invalid:
+        raise ValueError(f"Colunas desconhecidas no catálogo: {sorted(invalid)}")
+    fields["updated_at"] = now()
+    assignments = ", ".join(f"{column} = ?" for column in fields)
+    with conn:
+        conn.execute(f"UPDATE meetings SET {assignments} WHERE meeting_id = ?", (*fields.values(), meeting_id))
+
+def mark_stage(conn, meeting_id, stage, status="done", **artifacts):
+    if stage not in STAGES:
+        raise ValueError(f"Etapa desconhecida: {stage}")
+    update_meeting(conn, meeting_id, **{f"{stage}_status": status}, **artifacts)
+
+def get_meeting(conn, meeting_id):
+    row = conn.execute("SELECT * FROM meetings WHERE meeting_id = ?", (meeting_id,)).fetchone()
+    return dict(row) if row else None
+
+def pending_meetings(conn, stage):
+    """Reuniões cuja etapa anterior já terminou e que ainda não passaram por `stage`, mais recentes primeiro."""
+    required = STAGE_REQUIRES[stage]
+    query = f"SELECT * FROM meetings WHERE {stage}_status != 'done'"
+    if required:
+        query += f" AND {required}_status = 'done'"
+    query += " ORDER BY CAST(meeting_id AS INTEGER) DESC"
+    return [dict(row) for row in conn.execute(query)]
+
+def resolve_meeting(conn, stage, argv):
+    """Reunião indicada em argv (id ou caminho de artefato) ou, sem argumentos, a mais recente pendente em `stage`."""
+    if len(argv) > 1:
+        meeting_id = argv[1] if argv[1].isdigit() else meeting_id_from_path(argv[1])
+        return get_meeting(conn, meeting_id) if meeting_id else None
+    pending = pending_meetings(conn, stage)
+    return pending[0] if pending else None
+
+def list_files(directory, prefix, extension):
+    if not os.path.isdir(directory):
+        return {}
+    files = {}
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name.endswith(extension):
+            file_id = meeting_id_from_path(name)
+            if file_id:
+                files[int(file_id)] = os.path.join(directory, name)
+    return files
+
+def to_seconds(file_id):
+    # O join.js nomeia os arquivos com Date.now() (ms); os scripts antigos usavam time.time() (s).
+    return file_id / 1000 if file_id > 10 ** 11 else file_id
+
+def pair_following(meeting_ids, artifacts, after):
+    """Associa cada reunião ao primeiro artefato gerado depois de `after[reunião]` e antes da próxima reunião."""
+    pairs = {}
+    remaining = sorted(artifacts)
+    ordered = sorted(meeting_ids, key=lambda m: after[m])
+    for index, meeting_id in enumerate(ordered):
+        limit = after[ordered[index + 1]] if index + 1 < len(ordered) else float("inf")
+        for artifact_id in remaining:
+            if after[meeting_id] <= to_seconds(artifact_id) < limit:
+                pairs[meeting_id] = artifact_id
+                remaining.remove(artifact_id)
+                break
+    return pairs, remaining
+
+def indexed_file_names():
+    """Transcrições que já estão na coleção de reuniões (file_name ou aliases dos pontos)."""
+    from qdrant_client import QdrantClient
+
+    qdrant_client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+    names = set()
+    offset = None
+    while True:
+        points, offset = qdrant_client.scroll(
+            collection_name=MEETINGS_COLLECTION,
+            limit=1000,
+            offset=offset,
+            with_payload=["file_name", "aliases"],
+            with_vectors=False
+        )
+        for point in points:
+            payload = point.payload or {}
+            names.add(payload.get("file_name"))
+            names.update(payload.get("aliases") or [])
+        if offset is None:
+            names.discard(None)
+            return names
+
+def backfill(conn, indexed_files=()):
+    """Popula o catálogo a partir de uma varredura única do diretório files/ (arquivos anteriores ao catálogo).
+
+    Áudio, m4a e log compartilham o id da gravação. Transcrições, associações e atas antigas eram
+    nomeadas pelo horário de geração, então são ligadas à gravação imediatamente anterior; as que
+    não têm gravação viram reuniões próprias para que ainda possam ser indexadas. Transcrições cujo
+    nome está em `indexed_files` já foram indexadas pelo index_meetings.py antigo e não voltam a sê-lo.
+    """
+    pcms = list_files(os.path.join(files_dir, "pcmAudios"), "audio_", ".pcm")
+    m4as = list_files(os.path.join(files_dir, "m4aAudios"), "audio_", ".m4a")
+    logs = list_files(os.path.join(files_dir, "logs"), "log_", ".txt")
+    transcriptions = list_files(os.path.join(files_dir, "json"), "transcription_", ".json")
+    outputs = list_files(os.path.join(files_dir, "outputs"), "output_", ".txt")
+    atas = list_files(os.path.join(files_dir, "ata"), "ata_reuniao_", ".txt")
+
+    known = {row["meeting_id"] for row in conn.execute("SELECT meeting_id FROM meetings")}
+    recordings = sorted(set(pcms) | set(m4as))
+    after = {file_id: to_seconds(file_id) for file_id in recordings}
+
+    transcription_pairs, orphans = pair_following(recordings, transcriptions, after)
+    after.update({m: to_seconds(t) for m, t in transcription_pairs.items()})
+    output_pairs, _ = pair_following(list(transcription_pairs), outputs, after)
+    after.update({m: to_seconds(o) for m, o in output_pairs.items()})
+    ata_pairs, _ = pair_following(list(output_pairs), atas, after)
+
+    added = 0
+    for file_id in recordings + orphans:
+        meeting_id = str(file_id)
+        if meeting_id in known:
+            continue
+        register_meeting(conn, meeting_id)
+        if file_id in pcms:
+            update_meeting(conn, meeting_id, pcm_path=pcms[file_id], pcm_hash=file_hash(pcms[file_id]),
+                           duration_seconds=pcm_duration(pcms[file_id]))
+        if file_id in logs:
+            update_meeting(conn, meeting_id, log_path=logs[file_id])
+        if file_id in m4as:
+            mark_stage(conn, meeting_id, "convert", m4a_path=m4as[file_id], m4a_hash=file_hash(m4as[file_id]))
+
+        if file_id in transcription_pairs:
+            transcription = transcriptions[transcription_pairs[file_id]]
+        else:
+            transcription = transcriptions.get(file_id) if file_id in orphans else None
+        if transcription:
+            mark_stage(conn, meeting_id, "convert")
+            mark_stage(conn, meeting_id, "transcribe", transcription_path=transcription,
+                       transcription_hash=file_hash(transcription))
+            if os.path.basename(transcription) in indexed_files:
+                mark_stage(conn, meeting_id, "index")
+        if file_id in output_pairs:
+            mark_stage(conn, meeting_id, "associate", association_path=outputs[output_pairs[file_id]])
+        if file_id in ata_pairs:
+            mark_stage(conn, meeting_id, "ata", ata_path=atas[ata_pairs[file_id]])
+        added += 1
+    return added
+
+def print_status(conn):
+    for stage in STAGES:
+        pending = pending_meetings(conn, stage)
+        ids = ", ".join(meeting["meeting_id"] for meeting in pending) or "nenhuma"
+        print(f"{stage}: {len(pending)} pendente(s) ({ids})")
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    conn = connect()
+    if command == "backfill":
+        try:
+            indexed_files = indexed_file_names()
+        except Exception as e:
+            print(f"⚠️ Não foi possível ler a coleção '{MEETINGS_COLLECTION}' no Qdrant: {e}")
+            print("⚠️ As reuniões importadas ficam com 'index' pendente; o index_meetings.py vai reprocessá-las "
+                  "e descartar como duplicados os trechos que já estiverem na coleção.")
+            indexed_files = set()
+        added = backfill(conn, indexed_files)
+        print(f"✅ {added} reunião(ões) adicionada(s) ao catálogo.")
+        print_status(conn)
+    elif command == "status":
+        print_status(conn)
+    else:
+        print("❌ Uso: python scripts/catalog.py [status|backfill]")
+        exit(1)
@@ -1,6 +1,7 @@
 import os
 import sys
 import subprocess
+import catalog
 
 MAX_SIZE_MB = 25
 
@@ -29,9 +30,24 @@ command = [
     output_m4a
 ]
 
+meeting_id = catalog.meeting_id_from_path(input_pcm)
+conn = catalog.connect()
+if meeting_id:
+    log_path = os.path.join(catalog.files_dir, "logs", f"log_{meeting_id}.txt")
+    catalog.register_meeting(
+        conn, meeting_id,
+        pcm_path=os.path.abspath(input_pcm),
+        pcm_hash=catalog.file_hash(input_pcm),
+        duration_seconds=catalog.pcm_duration(input_pcm),
+        log_path=log_path if os.path.exists(log_path) else None
+    )
+
 try:
     subprocess.run(command, check=True)
     print(f"✅ Convertido com sucesso: {output_m4a}")
+    if meeting_id:
+        catalog.mark_stage(conn, meeting_id, "convert",
+                           m4a_path=os.path.abspath(output_m4a), m4a_hash=catalog.file_hash(output_m4a))
 
     size_bytes = os.path.getsize(output_m4a)
     size_mb = size_bytes / (1024 * 1024)
@@ -42,4 +58,6 @@ try:
     else:
         print("✅ Arquivo está dentro do limite da API.")
 except subprocess.CalledProcessError as e:
-    print(f"❌ Erro ao converter com ffmpeg: {e}")
\ No newline at end of file
+    print(f"❌ Erro ao converter com ffmpeg: {e}")
+    if meeting_id:
+        catalog.mark_stage(conn, meeting_id, "convert", status="failed")
\ No newline at end of file
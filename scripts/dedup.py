@@ -0,0 +1,181 @@
+import hashlib
+from collections import defaultdict
+import numpy as np
+
+NUM_PERM = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+SHINGLE_SIZE = 5
+NEAR_DUPLICATE_THRESHOLD = 0.85
+
+MERSENNE_PRIME = np.uint64(4294967291)
+_rng = np.random.default_rng(1)
+PERM_A = _rng.integers(1, 4294967291, size=NUM_PERM, dtype=np.uint64)
+PERM_B = _rng.integers(0, 4294967291, size=NUM_PERM, dtype=np.uint64)
+
+# Payload fields used only at index time; searches should not return them.
+SIGNATURE_FIELDS = ["content_hash", "minhash"]
+
+def signature_text(text):
+    # Case and indentation change meaning in code, so both the hash and the shingles only ignore
+    # trailing whitespace.
+    return "\n".join(line.rstrip() for line in text.rstrip().splitlines())
+
+def content_hash(text):
+    return hashlib.sha1(signature_text(text).encode('utf-8')).hexdigest()
+
+def shingle_tokens(text):
+    """Words of the text, with each line's indentation kept as its own token."""
+    tokens = []
+    for line in signature_text(text).split("\n"):
+        words = line.split()
+        if words:
+            tokens.append("\n" + line[:len(line) - len(line.lstrip())])
+            tokens.extend(words)
+    return tokens
+
+def shingle_hashes(text):
+    words = shingle_tokens(text) or [""]
+    if len(words) <= SHINGLE_SIZE:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest(), 'little') for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles)
+    )
+
+def minhash(text):
+    hashes = shingle_hashes(text)
+    # a * h + b fits in uint64 because a, b and h are all below 2^32.
+    permuted = (PERM_A[:, None] * hashes[None, :] + PERM_B[:, None]) % MERSENNE_PRIME
+    return permuted.min(axis=1).tolist()
+
+def lsh_keys(signature):
+    return [(band, tuple(signature[band * LSH_ROWS:(band + 1) * LSH_ROWS])) for band in range(LSH_BANDS)]
+
+def estimated_jaccard(sig_a, sig_b):
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+def new_index():
+    return {
+        "hashes": {},
+        "signatures": {},
+        "buckets": defaultdict(list),
+        "sources": {},
+        "aliases": {},
+    }
+
+def add_to_index(index, point_id, chunk_hash, signature, source, aliases=None):
+    index["hashes"].setdefault(chunk_hash, point_id)
+    index["signatures"][point_id] = signature
+    index["sources"][point_id] = source
+    index["aliases"][point_id] = list(aliases or [])
+    for key in lsh_keys(signature):
+        index["buckets"][key].append(point_id)
+
+def find_duplicate(index, chunk_hash, signature):
+    """Return (canonical point id, "exact" | "near") if the chunk is already indexed, else None."""
+    point_id = index["hashes"].get(chunk_hash)
+    if point_id is not None:
+        return point_id, "exact"
+
+    candidates = set()
+    for key in lsh_keys(signature):
+        candidates.update(index["buckets"].get(key, ()))
+    best_id, best_score = None, 0.0
+    for candidate in candidates:
+        score = estimated_jaccard(signature, index["signatures"][candidate])
+        if score > best_score:
+            best_id, best_score = candidate, score
+    if best_id is not None and best_score >= NEAR_DUPLICATE_THRESHOLD:
+        return best_id, "near"
+    return None
+
+def load_collection_index(qdrant_client, collection_name, text_key, source_key):
+    """Build a dedup index from the hashes and MinHash signatures stored in the collection payloads.
+
+    Points indexed before the signatures were stored only have the text; theirs are computed here.
+    """
+    index = new_index()
+    offset = None
+    while True:
+        points, offset = qdrant_client.scroll(
+            collection_name=collection_name,
+            limit=1000,
+            offset=offset,
+            with_payload=["content_hash", "minhash", "aliases", text_key, source_key],
+            with_vectors=False
+        )
+        for point in points:
+            payload = point.payload or {}
+            if "content_hash" in payload and "minhash" in payload:
+                chunk_hash, signature = payload["content_hash"], payload["minhash"]
+            elif payload.get(text_key):
+                chunk_hash, signature = content_hash(payload[text_key]), minhash(payload[text_key])
+            else:
+                continue
+            add_to_index(index, str(point.id), chunk_hash, signature,
+                         payload.get(source_key), payload.get("aliases"))
+        if offset is None:
+            return index
+
+def deduplicate_chunks(chunks, index, text_key, source_key, id_factory):
+    """Drop exact and near-duplicate chunks before embedding.
+
+    Kept chunks get "id", "content_hash", "minhash" and "aliases". A skipped chunk is recorded
+    as an alias of its canonical chunk: in chunk["aliases"] when the canonical chunk is from this
+    run, or in the returned {point_id: [sources]} dict when it is already in the collection.
+    """
+    unique_chunks = []
+    chunks_by_id = {}
+    existing_alias_updates = defaultdict(list)
+    stats = {"total": len(chunks), "exact": 0, "near": 0}
+
+    for chunk in chunks:
+        chunk_hash = content_hash(chunk[text_key])
+        signature = minhash(chunk[text_key])
+        duplicate = find_duplicate(index, chunk_hash, signature)
+
+        if duplicate is None:
+            chunk.update({"id": id_factory(), "content_hash": chunk_hash, "minhash": signature, "aliases": []})
+            add_to_index(index, chunk["id"], chunk_hash, signature, chunk[source_key])
+            chunks_by_id[chunk["id"]] = chunk
+            unique_chunks.append(chunk)
+            continue
+
+        point_id, kind = duplicate
+        stats[kind] += 1
+        source = chunk[source_key]
+        canonical = chunks_by_id.get(point_id)
+        if canonical is not None:
+            known = canonical["aliases"]
+        else:
+            known = index["aliases"][point_id] + existing_alias_updates[point_id]
+        if source != index["sources"][point_id] and source not in known:
+            if canonical is not None:
+                canonical["aliases"].append(source)
+            else:
+                existing_alias_updates[point_id].append(source)
+
+    skipped = stats["exact"] + stats["near"]
+    stats["kept"] = len(unique_chunks)
+    stats["reduction_pct"] = (100.0 * skipped / stats["total"]) if stats["total"] else 0.0
+    return unique_chunks, {k: v for k, v in existing_alias_updates.items() if v}, stats
+
+def apply_alias_updates(qdrant_client, collection_name, index, alias_updates):
+    for point_id, new_aliases in alias_updates.items():
+        aliases = index["aliases"][point_id] + new_aliases
+        qdrant_client.set_payload(
+            collection_name=collection_name,
+            payload={"aliases": aliases},
+            points=[point_id],
+            wait=True
+        )
+        index["aliases"][point_id] = aliases
+
+def format_stats(stats):
+    return (f"{stats['kept']} of {stats['total']} chunks kept "
+            f"({stats['exact']} exact and {stats['near']} near duplicates skipped, "
+            f"{stats['reduction_pct']:.1f}% reduction)")
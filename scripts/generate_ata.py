@@ -1,19 +1,19 @@
 import os
-import glob
+import sys
+import catalog
 from openai import OpenAI
 from datetime import datetime
 from dotenv import load_dotenv
 
 load_dotenv()
 
-base_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
-outputs_dir = os.path.join(base_dir, "files", "outputs")
-
-text_files = sorted(glob.glob(os.path.join(outputs_dir, "output_*.txt")), reverse=True)
-if not text_files:
-    print("❌ Nenhum output de transcrição encontrado.")
+conn = catalog.connect()
+meeting = catalog.resolve_meeting(conn, "ata", sys.argv)
+if not meeting or not meeting["association_path"]:
+    print("❌ Nenhum output de transcrição pendente de ATA no catálogo.")
     exit(1)
-latest_text = text_files[0]
+meeting_id = meeting["meeting_id"]
+latest_text = meeting["association_path"]
 print(f"📄 Usando transcrição: {latest_text}")
 
 with open(latest_text, "r", encoding="utf-8") as f:
@@ -30,6 +30,7 @@ Gere uma ATA clara e estruturada:
 - Informe também falas que podem agregar valor a nível de "memória de projeto"
 - Use uma linguagem formal e objetiva.
 - Não precisa enviar "Elaborado por"
+- Linhas como "Fulano: [trecho não transcrito de MM:SS a MM:SS]" são falas que não puderam ser transcritas: registre a lacuna na ata sem inventar o conteúdo.
 
 Inclua a data da reunião e um título "ATA DA REUNIÃO SEMANAL - DD/MM/AAAA", usando a data de {weekly_date}
 
@@ -51,17 +52,18 @@ response = client.chat.completions.create(
 ata = response.choices[0].message.content
 
 try:
-    ata_dir = os.path.join(base_dir, "files", "ata")
+    ata_dir = os.path.join(catalog.files_dir, "ata")
     os.makedirs(ata_dir, exist_ok=True)
-    timestamp = int(datetime.now().timestamp())
-    ata_path = os.path.join(ata_dir, f"ata_reuniao_{timestamp}.txt")
+    ata_path = os.path.join(ata_dir, f"ata_reuniao_{meeting_id}.txt")
     
     with open(ata_path, "w", encoding="utf-8") as f:
         f.write(ata)
     
     if os.path.exists(ata_path):
+        catalog.mark_stage(conn, meeting_id, "ata", ata_path=os.path.abspath(ata_path))
         print(f"✅ ATA gerada com sucesso: {ata_path}")
     else:
+        catalog.mark_stage(conn, meeting_id, "ata", status="failed")
         print(f"❌ Arquivo de ATA não foi criado: {ata_path}")
         
 except Exception as e:
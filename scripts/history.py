@@ -0,0 +1,208 @@
+import os
+import sys
+import json
+import hashlib
+import tiktoken
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import client, ROUTING_MODEL
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), '..', 'files', 'cache', 'conversations')
+
+RECENT_TURNS_TOKEN_BUDGET = 1500
+MIN_RECENT_TURNS = 2
+SUMMARY_MAX_TOKENS = 300
+MAX_CACHED_REWRITES = 20
+
+ROLES = ("user", "assistant")
+
+tokenizer = tiktoken.get_encoding("cl100k_base")
+
+def count_tokens(text):
+    return len(tokenizer.encode(text))
+
+def hash_text(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def parse_history(history_string):
+    """Converte o histórico enviado pelo commands/ask.js ("role: conteúdo" por linha) em turnos.
+
+    Linhas que não começam com um papel conhecido são continuação do turno anterior,
+    já que as respostas do assistente frequentemente têm várias linhas.
+    """
+    turns = []
+    for line in history_string.splitlines():
+        role, sep, content = line.partition(": ")
+        if sep and role in ROLES:
+            turns.append({"role": role, "content": content})
+        elif turns:
+            turns[-1]["content"] += "\n" + line
+    for turn in turns:
+        turn["content"] = turn["content"].strip()
+    return turns
+
+def format_turns(turns):
+    return "\n".join(f"{turn['role']}: {turn['content']}" for turn in turns)
+
+def turn_hash(turn):
+    return hash_text(f"{turn['role']}\x00{turn['content']}")
+
+def conversation_key(conversation_id, turns):
+    if conversation_id:
+        return hash_text(str(conversation_id))
+    # Sem id explícito, a primeira pergunta identifica a conversa.
+    return hash_text(format_turns(turns[:1]))
+
+def load_cache(key):
+    cache_path = os.path.join(CACHE_DIR, f"{key}.json")
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"summary": "", "summarized": [], "rewrites": {}}
+
+def save_cache(key, cache):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    cache_path = os.path.join(CACHE_DIR, f"{key}.json")
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(tmp_path, cache_path)
+
+def split_recent_turns(turns, budget=RECENT_TURNS_TOKEN_BUDGET):
+    """Separa os turnos antigos dos recentes, mantendo os mais novos que cabem no orçamento de tokens."""
+    used = 0
+    split_at = len(turns)
+    for index in range(len(turns) - 1, -1, -1):
+        cost = count_tokens(turns[index]["content"])
+        kept = len(turns) - index - 1
+        if kept >= MIN_RECENT_TURNS and used + cost > budget:
+            break
+        used += cost
+        split_at = index
+    return turns[:split_at], truncate_to_budget(turns[split_at:], used - budget)
+
+def truncate_to_budget(recent_turns, overflow):
+    """Corta o início dos turnos recentes mais antigos quando MIN_RECENT_TURNS estoura o orçamento.
+
+    Respostas longas do assistente são guardadas inteiras pelo commands/ask.js; mantemos só o final
+    delas para que o prompt continue limitado a RECENT_TURNS_TOKEN_BUDGET.
+    """
+    truncated = []
+    for turn in recent_turns:
+        if overflow > 0:
+            tokens = tokenizer.encode(turn["content"])
+            keep = max(0, len(tokens) - overflow)
+            overflow -= len(tokens) - keep
+            content = ("[...] " + tokenizer.decode(tokens[len(tokens) - keep:])) if keep else "[...]"
+            turn = {"role": turn["role"], "content": content}
+        truncated.append(turn)
+    return truncated
+
+def summarize_turns(previous_summary, new_turns):
+    system_prompt = f"""
+        Você mantém um resumo contínuo de uma conversa entre um usuário e um assistente técnico.
+        Atualize o resumo existente incorporando os novos turnos. Preserve nomes de repositórios, arquivos,
+        funções, reuniões, decisões e perguntas em aberto. Descarte cumprimentos e repetições.
+        Responda APENAS com o resumo atualizado, em no máximo {SUMMARY_MAX_TOKENS} tokens.
+    """
+    user_prompt = f"# Resumo atual\n{previous_summary or 'Nenhum.'}\n\n# Novos turnos\n{format_turns(new_turns)}"
+    response = client.chat.completions.create(
+        model=ROUTING_MODEL,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+    )
+    summary = response.choices[0].message.content.strip()
+    tokens = tokenizer.encode(summary)
+    if len(tokens) > SUMMARY_MAX_TOKENS:
+        summary = tokenizer.decode(tokens[:SUMMARY_MAX_TOKENS])
+    return summary
+
+def compact_history(cache, older_turns):
+    """Incorpora ao resumo em cache apenas os turnos antigos que ainda não foram resumidos."""
+    older_hashes = [turn_hash(turn) for turn in older_turns]
+    summarized = set(cache["summarized"])
+
+    if summarized and not summarized.intersection(older_hashes) and cache["summary"]:
+        # O histórico do Node expirou ou foi reiniciado: o resumo anterior não vale mais.
+        cache["summary"], cache["summarized"], summarized = "", [], set()
+
+    pending = [turn for turn, h in zip(older_turns, older_hashes) if h not in summarized]
+    if pending:
+        print(f"INFO: Compactando {len(pending)} turno(s) antigo(s) no resumo da conversa...", file=sys.stderr)
+        try:
+            cache["summary"] = summarize_turns(cache["summary"], pending)
+            cache["summarized"] = older_hashes
+        except Exception as e:
+            print(f"AVISO: Falha ao resumir o histórico, usando os turnos antigos sem resumo: {e}", file=sys.stderr)
+            return format_turns(older_turns)
+    else:
+        cache["summarized"] = older_hashes
+    return cache["summary"]
+
+def rewrite_query(cache, summary, recent_turns, question):
+    """Reescreve a pergunta de acompanhamento como uma consulta autocontida para embedding e busca."""
+    rewrite_key = hash_text(f"{summary}\x00{format_turns(recent_turns)}\x00{question}")
+    cached = cache["rewrites"].get(rewrite_key)
+    if cached:
+        return cached
+
+    system_prompt = """
+        Reescreva a última pergunta do usuário como uma consulta de busca autocontida, resolvendo pronomes
+        e referências ("isso", "ele", "e onde fica configurado?") com base no histórico da conversa.
+        Mantenha nomes de arquivos, funções, repositórios e termos técnicos exatamente como aparecem.
+        Se a pergunta já for autocontida, devolva-a sem alterações. Responda APENAS com a consulta reescrita.
+    """
+    user_prompt = (
+        f"# Resumo da conversa\n{summary or 'Nenhum.'}\n\n"
+        f"# Turnos recentes\n{format_turns(recent_turns)}\n\n"
+        f"# Pergunta\n{question}"
+    )
+    try:
+        response = client.chat.completions.create(
+            model=ROUTING_MODEL,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ]
+        )
+        rewritten = response.choices[0].message.content.strip() or question
+    except Exception as e:
+        print(f"AVISO: Falha ao reescrever a pergunta, usando a original: {e}", file=sys.stderr)
+        return question
+
+    cache["rewrites"][rewrite_key] = rewritten
+    while len(cache["rewrites"]) > MAX_CACHED_REWRITES:
+        cache["rewrites"].pop(next(iter(cache["rewrites"])))
+    return rewritten
+
+def prepare_history(history_string, question, conversation_id=None):
+    """Compacta o histórico e gera a consulta de busca para a pergunta atual.
+
+    Retorna (histórico para o prompt, consulta autocontida). Os turnos recentes ficam
+    literais; os antigos viram um resumo contínuo em cache por conversa, de modo que cada
+    nova pergunta só paga pelos turnos que saíram da janela recente.
+    """
+    turns = parse_history(history_string)
+    if not turns:
+        return "", question
+
+    key = conversation_key(conversation_id, turns)
+    cache = load_cache(key)
+
+    older_turns, recent_turns = split_recent_turns(turns)
+    summary = compact_history(cache, older_turns) if older_turns else ""
+    search_query = rewrite_query(cache, summary, recent_turns, question)
+
+    try:
+        save_cache(key, cache)
+    except OSError as e:
+        print(f"AVISO: Não foi possível salvar o cache da conversa: {e}", file=sys.stderr)
+
+    sections = []
+    if summary:
+        sections.append(f"Resumo dos turnos anteriores:\n{summary}")
+    sections.append(format_turns(recent_turns))
+    return "\n\n".join(sections), search_query
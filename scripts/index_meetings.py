@@ -5,12 +5,14 @@ from dotenv import load_dotenv
 from qdrant_client import QdrantClient, models
 from openai import OpenAI
 import tiktoken
+import catalog
+from dedup import load_collection_index, deduplicate_chunks, apply_alias_updates, format_stats
 
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 
 QDRANT_HOST = "localhost"
 QDRANT_PORT = 6333
-COLLECTION_NAME = "transmeet_meetings_local"
+COLLECTION_NAME = catalog.MEETINGS_COLLECTION
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 EMBEDDING_MODEL = "text-embedding-granite-embedding-278m-multilingual"
@@ -26,13 +28,8 @@ except Exception as e:
     print(f"ERROR: Failed to initialize clients: {e}")
     exit()
 
-def get_transcription_files():
-    json_dir = os.path.join(os.path.dirname(__file__), '..', 'files', 'json')
-    if not os.path.exists(json_dir):
-        print(f"ERROR: Directory not found: {json_dir}")
-        return []
-    
-    return [os.path.join(json_dir, f) for f in os.listdir(json_dir) if f.startswith("transcription_") and f.endswith(".json")]
+def get_pending_meetings(conn):
+    return [meeting for meeting in catalog.pending_meetings(conn, "index") if meeting["transcription_path"]]
 
 def chunk_text(text, file_name):
     chunks = []
@@ -63,6 +60,10 @@ def get_embeddings(texts):
     )
     return [item.embedding for item in response.data]
 
+def mark_indexed(conn, meeting_ids):
+    for meeting_id in meeting_ids:
+        catalog.mark_stage(conn, meeting_id, "index")
+
 def index_meetings_to_qdrant():
     try:
         collections = qdrant_client.get_collections().collections
@@ -80,20 +81,24 @@ def index_meetings_to_qdrant():
         print(f"ERROR: Qdrant error: {e}")
         return
 
-    transcription_files = get_transcription_files()
-    if not transcription_files:
-        print("INFO: No transcription files found to index.")
+    conn = catalog.connect()
+    pending_meetings = get_pending_meetings(conn)
+    if not pending_meetings:
+        print("INFO: No meetings pending indexing in the catalog.")
         return
         
-    print(f"Found {len(transcription_files)} transcription files to process.")
+    print(f"Found {len(pending_meetings)} transcribed meetings to index.")
 
     all_chunks = []
-    for file_path in transcription_files:
+    processed_meetings = []
+    for meeting in pending_meetings:
+        file_path = meeting["transcription_path"]
         try:
             with open(file_path, "r", encoding="utf-8") as f:
                 data = json.load(f)
             
             full_text = " ".join(segment["text"] for segment in data.get("segments", []))
+            processed_meetings.append(meeting["meeting_id"])
             if not full_text.strip():
                 continue
 
@@ -101,12 +106,36 @@ def index_meetings_to_qdrant():
             all_chunks.extend(chunk_text(full_text, os.path.basename(file_path)))
         except Exception as e:
             print(f"WARNING: Could not process file {file_path}: {e}")
+            catalog.mark_stage(conn, meeting["meeting_id"], "index", status="failed")
 
     if not all_chunks:
         print("INFO: No text content found in transcription files to index.")
+        mark_indexed(conn, processed_meetings)
         return
 
-    print(f"\nGenerated {len(all_chunks)} chunks from meetings to be indexed.")
+    print(f"\nGenerated {len(all_chunks)} chunks from meetings.")
+
+    print("Removing chunks already indexed or duplicated across meetings...")
+    try:
+        dedup_index = load_collection_index(qdrant_client, COLLECTION_NAME, text_key="text", source_key="file_name")
+    except Exception as e:
+        print(f"ERROR: Could not load indexed chunks from Qdrant: {e}")
+        return
+    all_chunks, alias_updates, dedup_stats = deduplicate_chunks(
+        all_chunks, dedup_index, text_key="text", source_key="file_name", id_factory=lambda: str(uuid.uuid4())
+    )
+    print(f"OK: Deduplication: {format_stats(dedup_stats)}.")
+
+    if alias_updates:
+        print(f"Recording aliases on {len(alias_updates)} already indexed chunks...")
+        apply_alias_updates(qdrant_client, COLLECTION_NAME, dedup_index, alias_updates)
+
+    if not all_chunks:
+        print("INFO: All meeting chunks are already indexed.")
+        mark_indexed(conn, processed_meetings)
+        return
+
+    print(f"{len(all_chunks)} chunks to be indexed.")
 
     print("Generating embeddings and indexing in Qdrant...")
     
@@ -122,12 +151,15 @@ def index_meetings_to_qdrant():
             collection_name=COLLECTION_NAME,
             points=[
                 models.PointStruct(
-                    id=str(uuid.uuid4()),
+                    id=chunk['id'],
                     vector=embedding,
                     payload={
                         "source": "meeting",
                         "text": chunk['text'], 
-                        "file_name": chunk['file_name']
+                        "file_name": chunk['file_name'],
+                        "aliases": chunk['aliases'],
+                        "content_hash": chunk['content_hash'],
+                        "minhash": chunk['minhash']
                     }
                 )
                 for chunk, embedding in zip(batch_chunks, embeddings)
@@ -135,6 +167,8 @@ def index_meetings_to_qdrant():
             wait=True
         )
     
+    mark_indexed(conn, processed_meetings)
+
     print("\n" + "-" * 30)
     print("OK: Meeting indexing complete!")
 
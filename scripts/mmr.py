@@ -0,0 +1,59 @@
+import os
+import numpy as np
+
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.6"))
+MMR_OVERFETCH_FACTOR = int(os.getenv("MMR_OVERFETCH_FACTOR", "4"))
+MMR_MAX_PER_FILE = int(os.getenv("MMR_MAX_PER_FILE", "2"))
+
+def hit_source_key(hit):
+    # Só trechos de código têm limite por arquivo; numa reunião o file_name é a transcrição inteira.
+    return (hit.payload or {}).get('file_path')
+
+def normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def mmr_select(query_embedding, hits, k, lambda_mult=MMR_LAMBDA, max_per_file=MMR_MAX_PER_FILE):
+    """Seleciona até k resultados por Maximal Marginal Relevance com limite de trechos por arquivo.
+
+    lambda_mult = 1 ordena só por relevância; valores menores penalizam trechos parecidos
+    com os já escolhidos. Os resultados precisam ter sido buscados com with_vectors=True.
+    """
+    if not hits or k <= 0:
+        return []
+    if any(not isinstance(hit.vector, list) for hit in hits):
+        return hits[:k]
+
+    vectors = normalize_rows(np.asarray([hit.vector for hit in hits], dtype=np.float32))
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query /= np.linalg.norm(query) or 1.0
+
+    relevance = vectors @ query
+    similarity = vectors @ vectors.T
+    max_similarity = np.full(len(hits), -np.inf, dtype=np.float32)
+    available = np.ones(len(hits), dtype=bool)
+
+    file_keys = [hit_source_key(hit) for hit in hits]
+    file_counts = {}
+    selected = []
+
+    while len(selected) < k and available.any():
+        if selected:
+            scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        else:
+            scores = relevance.copy()
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+
+        selected.append(best)
+        available[best] = False
+        max_similarity = np.maximum(max_similarity, similarity[:, best])
+
+        file_key = file_keys[best]
+        if file_key is not None and max_per_file > 0:
+            file_counts[file_key] = file_counts.get(file_key, 0) + 1
+            if file_counts[file_key] >= max_per_file:
+                available &= np.array([key != file_key for key in file_keys])
+
+    return [hits[index] for index in selected]
@@ -7,6 +7,7 @@ from github import Github, GithubException
 from qdrant_client import QdrantClient, models
 from openai import OpenAI
 import tiktoken
+from dedup import new_index, deduplicate_chunks, format_stats
 
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 
@@ -116,7 +117,13 @@ def index_repo_to_qdrant(repo_config):
         print(f"Chunking {file_path}...")
         all_chunks.extend(chunk_text(content, file_path))
 
-    print(f"\nGenerated {len(all_chunks)} chunks to be indexed.")
+    print(f"\nGenerated {len(all_chunks)} chunks.")
+
+    print("Removing duplicate and near-duplicate chunks...")
+    all_chunks, _, dedup_stats = deduplicate_chunks(
+        all_chunks, new_index(), text_key="text", source_key="file_path", id_factory=lambda: str(uuid.uuid4())
+    )
+    print(f"OK: Deduplication: {format_stats(dedup_stats)}.")
 
     if not all_chunks:
         print("INFO: No content to index.")
@@ -135,9 +142,14 @@ def index_repo_to_qdrant(repo_config):
             collection_name=collection_name,
             points=[
                 models.PointStruct(
-                    id=str(uuid.uuid4()),
+                    id=chunk['id'],
                     vector=embedding,
-                    payload={"source": "github", "code": chunk['text'], "file_path": chunk['file_path']}
+                    payload={
+                        "source": "github",
+                        "code": chunk['text'],
+                        "file_path": chunk['file_path'],
+                        "aliases": chunk['aliases']
+                    }
                 )
                 for chunk, embedding in zip(batch_chunks, embeddings)
             ],
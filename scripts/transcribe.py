@@ -1,21 +1,23 @@
 from dotenv import load_dotenv
 from openai import OpenAI
-import time
+import sys
 import os
 import json
+import catalog
 
 load_dotenv()
 
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-m4a_dir = "files/m4aAudios"
-m4a_files = sorted([f for f in os.listdir(m4a_dir) if f.endswith(".m4a")], reverse=True)
+conn = catalog.connect()
+meeting = catalog.resolve_meeting(conn, "transcribe", sys.argv)
 
-if not m4a_files:
-    print("❌ Nenhum arquivo m4a encontrado!")
+if not meeting or not meeting["m4a_path"]:
+    print("❌ Nenhum arquivo m4a pendente de transcrição no catálogo!")
     exit(1)
 
-m4a_path = os.path.join(m4a_dir, m4a_files[0])
+meeting_id = meeting["meeting_id"]
+m4a_path = meeting["m4a_path"]
 
 with open(m4a_path, "rb") as audio_file:
     response = client.audio.transcriptions.create(
@@ -27,12 +29,15 @@ with open(m4a_path, "rb") as audio_file:
 
 response_dict = response.model_dump()
 
-timestamp = int(time.time())
+json_dir = os.path.join(catalog.files_dir, "json")
+os.makedirs(json_dir, exist_ok=True)
 
-os.makedirs("files/json", exist_ok=True)
-
-output_path = f"files/json/transcription_{timestamp}.json"
+output_path = os.path.join(json_dir, f"transcription_{meeting_id}.json")
 with open(output_path, "w", encoding="utf-8") as f:
     json.dump(response_dict, f, indent=2, ensure_ascii=False)
 
+catalog.mark_stage(conn, meeting_id, "transcribe",
+                   transcription_path=os.path.abspath(output_path),
+                   transcription_hash=catalog.file_hash(output_path))
+
 print(f"✅ Transcrição salva em: {output_path}")
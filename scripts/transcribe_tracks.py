@@ -0,0 +1,309 @@
+from dotenv import load_dotenv
+from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import subprocess
+import tempfile
+import sys
+import os
+import re
+import json
+import numpy as np
+import catalog
+
+load_dotenv()
+
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+tracks_dir = os.path.join(catalog.files_dir, "tracks")
+
+SAMPLE_RATE = catalog.PCM_SAMPLE_RATE
+NUM_CHANNELS = catalog.PCM_CHANNELS
+BYTES_PER_SECOND = SAMPLE_RATE * NUM_CHANNELS * catalog.PCM_SAMPLE_WIDTH
+
+FRAME_SECONDS = 0.03
+SILENCE_THRESHOLD_DBFS = -45.0
+MIN_SPEECH_SECONDS = 0.3
+MERGE_GAP_SECONDS = 1.0
+SPAN_PADDING_SECONDS = 0.2
+MAX_SPAN_SECONDS = 600
+READ_BLOCK_SECONDS = 60
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", "4"))
+SPAN_ATTEMPTS = 2
+
+TRACK_FILE_RE = re.compile(r"^track_(\d+)\.pcm$")
+
+def load_tracks(meeting_dir):
+    """Lê o manifest.json da reunião ou, na falta dele, os arquivos track_<userId>.pcm.
+
+    Cada trilha é um PCM s16le 48 kHz estéreo de um único usuário, com silêncio nos trechos em
+    que ele não fala; offset_ms indica onde a trilha começa em relação ao início da reunião e
+    username é o nome do usuário no Discord, que o gravador deve escrever no manifest.
+    """
+    manifest_path = os.path.join(meeting_dir, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            entries = json.load(f).get("tracks", [])
+    else:
+        entries = [
+            {"user_id": match.group(1), "file": name}
+            for name in sorted(os.listdir(meeting_dir))
+            if (match := TRACK_FILE_RE.match(name))
+        ]
+
+    tracks = []
+    for entry in entries:
+        user_id = str(entry["user_id"])
+        speaker = entry.get("username")
+        if not speaker:
+            speaker = f"Participante {user_id}"
+            print(f"⚠️ Trilha {user_id} sem username no manifest.json; a ata vai listá-la como '{speaker}'.")
+        tracks.append({
+            "user_id": user_id,
+            "speaker": speaker,
+            "path": os.path.join(meeting_dir, entry.get("file", f"track_{user_id}.pcm")),
+            "offset": entry.get("offset_ms", 0) / 1000,
+        })
+    return tracks
+
+def frame_levels_dbfs(pcm_path):
+    """Nível RMS (dBFS) de cada quadro de FRAME_SECONDS, lendo o arquivo em blocos."""
+    samples_per_frame = int(SAMPLE_RATE * FRAME_SECONDS) * NUM_CHANNELS
+    block_samples = samples_per_frame * int(READ_BLOCK_SECONDS / FRAME_SECONDS)
+    levels = []
+    with open(pcm_path, "rb") as f:
+        while True:
+            block = np.fromfile(f, dtype="<i2", count=block_samples)
+            usable = len(block) - len(block) % samples_per_frame
+            if usable == 0:
+                break
+            frames = block[:usable].astype(np.float32).reshape(-1, samples_per_frame) / 32768.0
+            rms = np.sqrt(np.mean(frames * frames, axis=1))
+            levels.append(20 * np.log10(np.maximum(rms, 1e-10)))
+    return np.concatenate(levels) if levels else np.empty(0, dtype=np.float32)
+
+def active_spans(pcm_path):
+    """Trechos (início, fim) em segundos em que a trilha tem fala, já unidos e com margem."""
+    active = frame_levels_dbfs(pcm_path) > SILENCE_THRESHOLD_DBFS
+    if not active.any():
+        return []
+    duration = os.path.getsize(pcm_path) / BYTES_PER_SECOND
+
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], active.astype(np.int8), [0]))))
+    raw_spans = [(start * FRAME_SECONDS, end * FRAME_SECONDS) for start, end in zip(edges[::2], edges[1::2])]
+
+    spans = []
+    for start, end in raw_spans:
+        if spans and start - spans[-1][1] <= MERGE_GAP_SECONDS:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+
+    padded = []
+    for start, end in spans:
+        if end - start < MIN_SPEECH_SECONDS:
+            continue
+        start, end = max(0.0, start - SPAN_PADDING_SECONDS), min(duration, end + SPAN_PADDING_SECONDS)
+        while end - start > MAX_SPAN_SECONDS:
+            padded.append((start, start + MAX_SPAN_SECONDS))
+            start += MAX_SPAN_SECONDS
+        padded.append((start, end))
+    return padded
+
+def read_span(pcm_path, start, end):
+    frame_bytes = NUM_CHANNELS * catalog.PCM_SAMPLE_WIDTH
+    offset = int(start * SAMPLE_RATE) * frame_bytes
+    length = int((end - start) * SAMPLE_RATE) * frame_bytes
+    with open(pcm_path, "rb") as f:
+        f.seek(offset)
+        return f.read(length)
+
+def transcribe_span(track, start, end):
+    command = [
+        "ffmpeg", "-loglevel", "error",
+        "-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", str(NUM_CHANNELS), "-i", "pipe:0",
+        "-ac", "1", "-ar", "16000", "-c:a", "aac", "-b:a", "64k",
+        "-y",
+    ]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m4a_path = os.path.join(tmp_dir, "span.m4a")
+        subprocess.run(command + [m4a_path], input=read_span(track["path"], start, end), check=True)
+        with open(m4a_path, "rb") as audio_file:
+            response = client.audio.transcriptions.create(
+                model="whisper-1",
+                file=audio_file,
+                response_format="verbose_json",
+                timestamp_granularities=["segment"]
+            )
+
+    segments = []
+    for segment in response.model_dump().get("segments") or []:
+        text = segment.get("text", "").strip()
+        if not text:
+            continue
+        segments.append({
+            "start": track["offset"] + start + segment.get("start", 0),
+            "end": track["offset"] + start + segment.get("end", 0),
+            "speaker": track["speaker"],
+            "user_id": track["user_id"],
+            "text": text,
+        })
+    return segments
+
+def transcribe_span_with_retry(track, start, end):
+    for attempt in range(1, SPAN_ATTEMPTS + 1):
+        try:
+            return transcribe_span(track, start, end)
+        except Exception as e:
+            if attempt == SPAN_ATTEMPTS:
+                raise
+            print(f"⚠️ Falha no trecho {track['user_id']} {start:.1f}-{end:.1f}s, tentando novamente: {e}")
+
+def track_seconds(track):
+    return os.path.getsize(track["path"]) / BYTES_PER_SECOND
+
+def transcribe_jobs(jobs):
+    """Transcreve os trechos (trilha, início, fim) em paralelo; devolve os segmentos e os trechos que falharam."""
+    # Um trecho com erro não descarta os demais, que já foram transcritos (e pagos).
+    segments, failed_spans = [], []
+    with ThreadPoolExecutor(max_workers=TRANSCRIBE_WORKERS) as executor:
+        futures = {executor.submit(transcribe_span_with_retry, *job): job for job in jobs}
+        for future in as_completed(futures):
+            track, start, end = futures[future]
+            try:
+                segments.extend(future.result())
+            except Exception as e:
+                print(f"❌ Trecho {track['user_id']} {start:.1f}-{end:.1f}s falhou: {e}")
+                failed_spans.append({
+                    "user_id": track["user_id"],
+                    "speaker": track["speaker"],
+                    "start": track["offset"] + start,
+                    "end": track["offset"] + end,
+                    "error": str(e),
+                })
+    return segments, failed_spans
+
+def speech_jobs(tracks):
+    jobs = []
+    total_seconds = speech_seconds = 0.0
+    for track in tracks:
+        spans = active_spans(track["path"])
+        total_seconds += track_seconds(track)
+        speech_seconds += sum(end - start for start, end in spans)
+        print(f"🎙️ {track['speaker']}: {len(spans)} trecho(s) de fala")
+        jobs.extend((track, start, end) for start, end in spans)
+
+    if total_seconds:
+        print(f"⏱️ Transcrevendo {speech_seconds:.0f}s de fala de {total_seconds:.0f}s de áudio "
+              f"({100 * speech_seconds / total_seconds:.1f}%) em {len(jobs)} requisição(ões)")
+    return jobs
+
+def retry_jobs(tracks, failed_spans):
+    """Trechos que falharam numa execução anterior; os de trilhas que não existem mais continuam falhos."""
+    tracks_by_user = {track["user_id"]: track for track in tracks}
+    jobs, missing = [], []
+    for span in failed_spans:
+        track = tracks_by_user.get(span["user_id"])
+        if track is None:
+            missing.append(span)
+        else:
+            jobs.append((track, span["start"] - track["offset"], span["end"] - track["offset"]))
+    print(f"🔁 Retranscrevendo {len(jobs)} trecho(s) que falharam na execução anterior")
+    return jobs, missing
+
+def format_time(seconds):
+    return f"{int(seconds // 60):02d}:{int(seconds % 60):02d}"
+
+def output_lines(segments, failed_spans):
+    """Falas no formato 'locutor: texto', com um marcador no lugar de cada trecho que não foi transcrito."""
+    lines = [(segment["start"], f"{segment['speaker']}: {segment['text']}") for segment in segments]
+    lines.extend(
+        (span["start"], f"{span['speaker']}: [trecho não transcrito de {format_time(span['start'])} a {format_time(span['end'])}]")
+        for span in failed_spans
+    )
+    return [line for _, line in sorted(lines, key=lambda line: line[0])]
+
+def resolve_meeting_id(conn, argv):
+    """Reunião indicada em argv (id ou diretório) ou, sem argumentos, a mais recente do catálogo com
+    transcrição pendente ou parcial que tenha trilhas por usuário."""
+    if len(argv) > 1:
+        return os.path.basename(os.path.normpath(argv[1]))
+    for meeting in catalog.pending_meetings(conn, "transcribe"):
+        if os.path.isdir(os.path.join(tracks_dir, meeting["meeting_id"])):
+            return meeting["meeting_id"]
+    return None
+
+conn = catalog.connect()
+meeting_id = resolve_meeting_id(conn, sys.argv)
+meeting_dir = sys.argv[1] if len(sys.argv) > 1 and os.path.isdir(sys.argv[1]) else None
+if meeting_id and not meeting_dir:
+    meeting_dir = os.path.join(tracks_dir, meeting_id)
+if not meeting_dir or not os.path.isdir(meeting_dir):
+    print("❌ Nenhum diretório de trilhas por usuário encontrado!")
+    exit(1)
+
+tracks = [track for track in load_tracks(meeting_dir) if os.path.exists(track["path"])]
+if not tracks:
+    print(f"❌ Nenhuma trilha encontrada em {meeting_dir}!")
+    exit(1)
+
+# Com uma trilha por usuário não há áudio misto para converter: a etapa fica concluída aqui.
+meeting_seconds = max(track["offset"] + track_seconds(track) for track in tracks)
+catalog.register_meeting(conn, meeting_id)
+catalog.mark_stage(conn, meeting_id, "convert", duration_seconds=meeting_seconds)
+log_path = os.path.join(catalog.files_dir, "logs", f"log_{meeting_id}.txt")
+if os.path.exists(log_path):
+    catalog.update_meeting(conn, meeting_id, log_path=log_path)
+
+json_dir = os.path.join(catalog.files_dir, "json")
+output_dir = os.path.join(catalog.files_dir, "outputs")
+os.makedirs(json_dir, exist_ok=True)
+os.makedirs(output_dir, exist_ok=True)
+json_path = os.path.join(json_dir, f"transcription_{meeting_id}.json")
+output_path = os.path.join(output_dir, f"output_{meeting_id}.txt")
+
+meeting = catalog.get_meeting(conn, meeting_id)
+try:
+    if meeting["transcribe_status"] == "partial" and os.path.exists(json_path):
+        with open(json_path, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        jobs, failed_spans = retry_jobs(tracks, previous.get("failed_spans", []))
+        segments, still_failed = transcribe_jobs(jobs)
+        segments = previous.get("segments", []) + segments
+        failed_spans += still_failed
+    else:
+        segments, failed_spans = transcribe_jobs(speech_jobs(tracks))
+except Exception as e:
+    print(f"❌ Erro ao transcrever as trilhas: {e}")
+    catalog.mark_stage(conn, meeting_id, "transcribe", status="failed")
+    exit(1)
+
+if failed_spans and not segments:
+    print("❌ Todos os trechos falharam na transcrição.")
+    catalog.mark_stage(conn, meeting_id, "transcribe", status="failed")
+    exit(1)
+
+segments.sort(key=lambda segment: (segment["start"], segment["end"]))
+failed_spans.sort(key=lambda span: span["start"])
+
+with open(json_path, "w", encoding="utf-8") as f:
+    json.dump({
+        "text": " ".join(s["text"] for s in segments),
+        "segments": segments,
+        "failed_spans": failed_spans,
+    }, f, indent=2, ensure_ascii=False)
+
+with open(output_path, "w", encoding="utf-8") as f:
+    for line in output_lines(segments, failed_spans):
+        f.write(f"{line}\n")
+
+# Com trechos faltando, 'partial' mantém a reunião pendente: a próxima execução retranscreve só os
+# failed_spans. Com uma trilha por usuário o locutor já é conhecido, então a associação acompanha.
+status = "partial" if failed_spans else "done"
+if failed_spans:
+    print(f"⚠️ {len(failed_spans)} trecho(s) sem transcrição; marcados no texto e registrados em failed_spans no JSON.")
+catalog.mark_stage(conn, meeting_id, "transcribe", status=status,
+                   transcription_path=os.path.abspath(json_path), transcription_hash=catalog.file_hash(json_path))
+catalog.mark_stage(conn, meeting_id, "associate", status=status, association_path=os.path.abspath(output_path))
+
+print(f"✅ Transcrição por locutor salva em: {json_path}")
+print(f"✅ Texto associado salvo em: {output_path}")